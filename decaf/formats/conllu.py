@@ -1,6 +1,8 @@
+import itertools
 import re
+import sys
 
-from conllu import TokenList, TokenTree, Token, parse_incr
+from conllu import TokenList, Token, parse_incr
 
 from decaf.index import Literal, Structure
 from decaf.formats.parser import FormatParser
@@ -14,6 +16,22 @@ CONLLU_METADATA_CARRYOVER = {
 	r'meta::.+': None  # GUM document-level metadata field (e.g., 'meta::dateCollected')
 }
 
+# carryover patterns fused into one compiled alternation (matched leftmost-first, like the dict order),
+# with a prefix dispatch covering the standard fields
+_CARRYOVER_ALTERNATION = re.compile('|'.join(
+	f'(?P<c{alternative_idx}>{pattern})' for alternative_idx, pattern in enumerate(CONLLU_METADATA_CARRYOVER)
+))
+_CARRYOVER_FIELDS = {
+	f'c{alternative_idx}': index_field
+	for alternative_idx, index_field in enumerate(CONLLU_METADATA_CARRYOVER.values())
+}
+_CARRYOVER_PREFIXES = {'newdoc': 'document', 'newpar': 'paragraph'}
+
+# the standard CoNLL-U column set, used to specialize token parsing for the common shape
+_UD_TOKEN_KEYS = frozenset({'id', 'form', 'lemma', 'upos', 'xpos', 'feats', 'head', 'deprel', 'deps', 'misc'})
+_UD_TOKEN_ANNOTATIONS = ('lemma', 'upos', 'xpos', 'feats', 'head', 'deprel', 'misc')  # in column order, minus skipped fields
+_SKIP_ANNOTATIONS = frozenset({'id', 'deps', 'form'})  # redundant annotations (UD ID, dep-tuple, surface form)
+
 
 class ConlluBatcher:
     def __init__(self, file, start=0, end=float('inf')):
@@ -31,8 +49,18 @@ class ConlluBatcher:
 
     @staticmethod
     def get_size(file):
-        with open(file) as fp:
-            num_sentences = sum(1 for line in fp if line.startswith('1\t'))
+        # count sentence-initial lines via bulk byte scans instead of a Python per-line loop
+        num_sentences = 0
+        tail = b'\n'  # virtual newline preceding the first line
+        with open(file, 'rb') as fp:
+            while True:
+                chunk = fp.read(1 << 24)
+                if not chunk:
+                    break
+                block = tail + chunk
+                num_sentences += block.count(b'\n1\t')
+                # carry over the block boundary (shorter than the pattern, so no double counting)
+                tail = block[-2:]
         return num_sentences
 
     def get_boundary(self, sentence):
@@ -41,17 +69,55 @@ class ConlluBatcher:
                 return 'document'
         return None
 
+    @staticmethod
+    def get_raw_boundary(sentence):
+        # detect document boundaries from the comment lines of a raw sentence block
+        for line in sentence.split('\n'):
+            if not line.startswith('#'):
+                break
+            if line[1:].strip().startswith('newdoc'):
+                return 'document'
+        return None
+
+    def get_raw_sentences(self):
+        # yield raw sentence blocks (lines between sentence-terminating blank lines) without parsing
+        block = []
+        for line in self._file_pointer:
+            if not line.strip():
+                if block:
+                    yield ''.join(block)
+                    block = []
+                continue
+            block.append(line)
+        if block:
+            yield ''.join(block)
+
+    def skip_sentences(self, num_sentences):
+        # advance the raw file pointer past the given number of sentences without parsing them
+        num_skipped = 0
+        while num_skipped < num_sentences:
+            line = self._file_pointer.readline()
+            if not line:
+                break
+            if not line.strip():
+                num_skipped += 1
+        return num_skipped
+
     def get_batches(self, batch_size):
         assert self._file_pointer is not None, f"[Error] ConlluBatcher must be used within a context manager."
 
         batch = []
 
+        # seek ahead until offset on the raw file (cannot call file.seek() because parser calls next())
+        if self.start > 0:
+            self.skip_sentences(self.start)
+
         # iterate over all sentences
         in_boundary = False  # flag to check whether sentence falls within structural boundary
-        for sentence_idx, sentence in enumerate(parse_incr(self._file_pointer)):
-            # seek ahead until offset (cannot call file.seek() because parser calls next())
-            if (sentence_idx < self.start) or (sentence_idx > self.end):
-                continue
+        for sentence_idx, sentence in enumerate(parse_incr(self._file_pointer), start=self.start):
+            # stop after the end offset
+            if sentence_idx > self.end:
+                break
 
             # check if batch has reached target size
             batch_complete = False
@@ -80,6 +146,51 @@ class ConlluBatcher:
         # yield final batch
         yield batch
 
+    def get_raw_batches(self, batch_size):
+        # mirror of get_batches over raw sentence blocks: batches are lists of CoNLL-U text blocks,
+        # which ship through IPC as compact strings and are parsed by the consumer
+        assert self._file_pointer is not None, f"[Error] ConlluBatcher must be used within a context manager."
+
+        batch = []
+
+        # seek ahead until offset on the raw file
+        if self.start > 0:
+            self.skip_sentences(self.start)
+
+        # iterate over all sentences
+        in_boundary = False  # flag to check whether sentence falls within structural boundary
+        for sentence_idx, sentence in enumerate(self.get_raw_sentences(), start=self.start):
+            # stop after the end offset
+            if sentence_idx > self.end:
+                break
+
+            # check if batch has reached target size
+            batch_complete = False
+            if len(batch) >= batch_size:
+                # check for new document boundary
+                if self.get_raw_boundary(sentence):
+                    # if previous batch is not empty
+                    if len(batch) > 0:
+                        batch_complete = True
+                    # mark sentence as being within document
+                    in_boundary = True
+
+                # if sentence does not fall within a document boundary, batch is complete at target size
+                if not in_boundary:
+                    batch_complete = True
+
+            # append batch if complete
+            if batch_complete:
+                # export previous batch and start new one
+                yield batch
+                batch = []
+
+            # append sentence to batch
+            batch.append(sentence)
+
+        # yield final batch
+        yield batch
+
 
 class ConlluParser(FormatParser):
     def __init__(self, literal_level:str, force_alignment:bool, sentence_terminator:str):
@@ -89,17 +200,23 @@ class ConlluParser(FormatParser):
         self.sentence_terminator = sentence_terminator
 
     def get_carryover_field(self, field):
-        for carryover_pattern, index_field in CONLLU_METADATA_CARRYOVER.items():
-            # check if metadata field matches carryover field pattern
-            if re.match(carryover_pattern, field) is None:
-                continue
-            # check if field requires name conversion
-            if index_field is None:
-                return field
-            else:
-                return index_field
-        # return None is examined field is not for carryover
-        return None
+        # fast path: dispatch on the field prefix ('newdoc', 'newdoc id', 'newpar', 'newpar id', 'meta::...')
+        index_field = _CARRYOVER_PREFIXES.get(field.split(' ', 1)[0])
+        if index_field is not None:
+            return index_field
+        if field.startswith('meta::') and (len(field) > len('meta::')):
+            return field
+        # fall back to the fused carryover alternation (one match dispatches to the right field)
+        match = _CARRYOVER_ALTERNATION.match(field)
+        if match is None:
+            # examined field is not for carryover
+            return None
+        index_field = _CARRYOVER_FIELDS[match.lastgroup]
+        # check if field requires name conversion
+        if index_field is None:
+            return field
+        else:
+            return index_field
 
     #
     # parser functions
@@ -109,12 +226,12 @@ class ConlluParser(FormatParser):
         list[Literal], list[Structure], list[tuple[Structure, Structure]]]:
         literals, structures, hierarchies = [], [], []
 
-        # create literals from characters
+        # create literals from characters (single bulk comprehension, no per-character appends)
         if literal_level == 'character':
-            for character_idx, character in enumerate(token['form']):
-                literals.append(
-                    Literal(start=cursor_idx + character_idx, end=cursor_idx + character_idx + 1, value=character)
-                )
+            literals = [
+                Literal(start=character_idx, end=character_idx + 1, value=character)
+                for character_idx, character in enumerate(token['form'], start=cursor_idx)
+            ]
         # create literals from tokens
         elif literal_level == 'token':
             literals.append(Literal(start=cursor_idx, end=cursor_idx + len(token['form']), value=token['form']))
@@ -124,77 +241,137 @@ class ConlluParser(FormatParser):
         # create structures from UD's token-level annotations
         # https://universaldependencies.org/format.html
         start_idx, end_idx = cursor_idx, cursor_idx + len(token['form'])
+        # all structures of one token share the same literal list (never mutated after construction),
+        # instead of each holding its own shallow copy
         # token's surface form
         token_structure = Structure(
             start=start_idx, end=end_idx,
             value=None, stype='token',  # value=None as it's constructed from its literals
-            literals=[l for l in literals]
+            literals=literals
         )
         structures.append(token_structure)
+
+        # bind the hot append methods once (skips attribute dispatch per annotation)
+        append_structure = structures.append
+        append_hierarchy = hierarchies.append
+
+        # fast path: tokens with the standard UD column set iterate a precomputed annotation order,
+        # skipping the per-key membership and redundancy checks of the generic loop
+        if token.keys() == _UD_TOKEN_KEYS:
+            for annotation in _UD_TOKEN_ANNOTATIONS:
+                value = token[annotation]
+                # skip empty annotation fields
+                if value is None:
+                    continue
+                # split multi-value annotation fields into individual structures
+                elif value.__class__ is dict:
+                    for sub_annotation, sub_value in value.items():
+                        annotation_structure = Structure(
+                            start=start_idx, end=end_idx,
+                            value=sub_value, stype=sys.intern(sub_annotation),
+                            literals=literals
+                        )
+                        append_structure(annotation_structure)
+                        append_hierarchy((token_structure, annotation_structure))
+                # all other annotations are stored as token-level structures
+                else:
+                    annotation_structure = Structure(
+                        start=start_idx, end=end_idx,
+                        value=value, stype=annotation,
+                        literals=literals
+                    )
+                    append_structure(annotation_structure)
+                    append_hierarchy((token_structure, annotation_structure))
+            return literals, structures, hierarchies
+
         # create structures from other token-level annotations
-        for annotation in token:
-            # skip redundant annotations (UD ID, dep-tuple)
-            if annotation in {'id', 'deps', 'form'}:
-                continue
-            # skip empty annotation fields
-            elif token[annotation] is None:
+        for annotation, value in token.items():
+            # skip redundant annotations and empty annotation fields
+            if (annotation in _SKIP_ANNOTATIONS) or (value is None):
                 continue
             # split multi-value annotation fields into individual structures
-            elif type(token[annotation]) is dict:
-                for misc_annotation, misc_value in token[annotation].items():
-                    structures.append(
-                        Structure(
-                            start=start_idx, end=end_idx,
-                            value=misc_value, stype=misc_annotation,
-                            literals=[l for l in literals]
-                        )
+            elif value.__class__ is dict:
+                for misc_annotation, misc_value in value.items():
+                    annotation_structure = Structure(
+                        start=start_idx, end=end_idx,
+                        value=misc_value, stype=sys.intern(misc_annotation),
+                        literals=literals
                     )
-                    hierarchies.append((token_structure, structures[-1]))
+                    append_structure(annotation_structure)
+                    append_hierarchy((token_structure, annotation_structure))
             # all other annotations are stored as token-level structures
             else:
-                structures.append(
-                    Structure(
-                        start=start_idx, end=end_idx,
-                        value=token[annotation], stype=annotation,
-                        literals=[l for l in literals]
-                    )
+                annotation_structure = Structure(
+                    start=start_idx, end=end_idx,
+                    value=value, stype=sys.intern(annotation),
+                    literals=literals
                 )
-                hierarchies.append((token_structure, structures[-1]))
+                append_structure(annotation_structure)
+                append_hierarchy((token_structure, annotation_structure))
 
         return literals, structures, hierarchies
 
-    def parse_dependencies(self, tree: TokenTree, token_structures: dict[int, Structure]):
-        structures, hierarchies = [], []
-
-        relation = tree.token['deprel']
-        token_id = tree.token['id']
-        literals = [l for l in token_structures[token_id].literals]
-        start_idx, end_idx = token_structures[token_id].start, token_structures[token_id].end
-
-        # recursively process child nodes
-        children = []  # store direct children for hierarchy
-        for child in tree.children:
-            child_structures, child_hierarchies, child_literals = self.parse_dependencies(tree=child,
-                                                                                     token_structures=token_structures)
-            children.append(child_structures[0])
-            structures += child_structures
-            hierarchies += child_hierarchies
-            literals += child_literals
-            start_idx = min(start_idx, token_structures[child.token['id']].start)
-            end_idx = max(end_idx, token_structures[child.token['id']].end)
-
-        # append parent structure
-        dependency = Structure(
-            start=start_idx, end=end_idx,
-            value=relation, stype='dependency',
-            literals=[l for l in literals]
-        )
-        hierarchies += \
-            [(dependency, token_structures[token_id])] + \
-            [(dependency, child) for child in children]
-        structures = [dependency] + structures
+    def parse_dependencies(self, tokens: list[Token], token_structures: dict[int, Structure]):
+        # build the head -> children map in one pass over the tokens,
+        # skipping conllu's intermediate TokenTree object graph entirely
+        deprels = {}
+        children_by_id = {}
+        for token in tokens:
+            head_id = token['head']
+            # mirror conllu's tree construction: drop tokens without a usable head
+            if (head_id is None) or (head_id < 0):
+                continue
+            token_id = token['id']
+            deprels[token_id] = token['deprel']
+            children_by_id.setdefault(head_id, []).append(token_id)
+        root_ids = children_by_id.get(0, [])
+        assert len(root_ids) == 1, f"[Error] Expected a single root token, found {len(root_ids)}."
+
+        # iterative post-order traversal (no Python recursion on deep trees,
+        # no per-level rebuilding of the structure and hierarchy lists)
+        dependencies = {}  # token ID -> dependency structure, filled bottom-up
+        hierarchies = []
+        stack = [(root_ids[0], False)]
+        while stack:
+            token_id, children_done = stack.pop()
+            child_ids = children_by_id.get(token_id, ())
+            if not children_done:
+                # first visit: revisit the token once its children have been processed
+                stack.append((token_id, True))
+                stack.extend((child_id, False) for child_id in reversed(child_ids))
+                continue
+
+            token_structure = token_structures[token_id]
+            start_idx, end_idx = token_structure.start, token_structure.end
+            # subtree literals: the token's own, followed by each child subtree's
+            literals = list(token_structure.literals)
+            for child_id in child_ids:
+                child_token_structure = token_structures[child_id]
+                literals += dependencies[child_id].literals
+                if child_token_structure.start < start_idx:
+                    start_idx = child_token_structure.start
+                if child_token_structure.end > end_idx:
+                    end_idx = child_token_structure.end
+
+            dependency = Structure(
+                start=start_idx, end=end_idx,
+                value=deprels[token_id], stype='dependency',
+                literals=literals
+            )
+            dependencies[token_id] = dependency
+            # emit this node's edges after all of its descendants' edges
+            hierarchies.append((dependency, token_structure))
+            hierarchies.extend((dependency, dependencies[child_id]) for child_id in child_ids)
+
+        # list dependency structures in pre-order (each parent before its subtree)
+        structures = []
+        stack = [root_ids[0]]
+        while stack:
+            token_id = stack.pop()
+            structures.append(dependencies[token_id])
+            stack.extend(reversed(children_by_id.get(token_id, ())))
 
-        return structures, hierarchies, literals
+        return structures, hierarchies, structures[0].literals
 
     def parse_carryover(
             self,
@@ -280,14 +457,23 @@ class ConlluParser(FormatParser):
                 # add document to output structures
                 output_structures = [document] + output_structures
 
-            # reset all carryover data
+            # reset all carryover data (all keys accumulate the same literals from here on,
+            # so they share one backing list until a paragraph break re-binds its own)
             carryover = next_carryover
-            literals = {s:[] for s in next_carryover}
+            shared_literals = []
+            literals = {s: shared_literals for s in next_carryover}
             sentences = {s:[] for s in next_carryover}
 
         # keep track of literals and sentences that are part of an ongoing carryover structure
-        literals = {s: v + next_literals for s, v in literals.items()}
-        sentences = {s: v + [next_sentence] for s, v in sentences.items()}
+        # (in-place appends; rebuilding these lists every sentence is quadratic over long documents)
+        extended_ids = set()  # literal lists may be shared across keys, extend each exactly once
+        for ongoing_literals in literals.values():
+            if id(ongoing_literals) in extended_ids:
+                continue
+            ongoing_literals.extend(next_literals)
+            extended_ids.add(id(ongoing_literals))
+        for ongoing_sentences in sentences.values():
+            ongoing_sentences.append(next_sentence)
 
         return carryover, literals, sentences, output_structures, output_hierarchies
 
@@ -296,18 +482,20 @@ class ConlluParser(FormatParser):
         carryover = {}
 
         # parse tokens in sentence
-        sentence_tokens = [token for token in sentence if type(token['id']) is not tuple]  # remove multi-tokens (e.g. "It's" -> "It 's"), identified by ID with range (e.g., '3-4')
+        sentence_tokens = [token for token in sentence if token['id'].__class__ is not tuple]  # remove multi-tokens (e.g. "It's" -> "It 's"), identified by ID with range (e.g., '3-4')
         text_cursor_idx = 0  # position within sentence
         tokens_by_id = {}
+        # bind the growing buffers' extend methods once for the token loop
+        extend_literals, extend_structures, extend_hierarchies = literals.extend, structures.extend, hierarchies.extend
         for token_idx, token in enumerate(sentence_tokens):
             # process token
             token_literals, token_structures, token_hierarchies = self.parse_token(
                 token, cursor_idx + text_cursor_idx,
                 literal_level=literal_level
             )
-            literals += token_literals
-            structures += token_structures
-            hierarchies += token_hierarchies
+            extend_literals(token_literals)
+            extend_structures(token_structures)
+            extend_hierarchies(token_hierarchies)
             tokens_by_id[token['id']] = token_structures[0]
 
             # case: force alignment between tokens and original sentence text
@@ -364,9 +552,9 @@ class ConlluParser(FormatParser):
             )
             text_cursor_idx += 1
 
-        # create hierarchical dependency structures
+        # create hierarchical dependency structures (directly from head annotations, no to_tree())
         dependency_structures, dependency_hierarchies, _ = self.parse_dependencies(
-            tree=sentence.to_tree(),
+            tokens=sentence_tokens,
             token_structures=tokens_by_id
         )
         structures = dependency_structures + structures
@@ -374,11 +562,13 @@ class ConlluParser(FormatParser):
 
         # create structures from UD's sentence-level annotations
         start_idx, end_idx = cursor_idx, cursor_idx + text_cursor_idx
+        # the sentence structure and its metadata structures share the sentence's literal list,
+        # which receives no further appends from here on
         # sentence structure itself
         sentence_structure = Structure(
             start=start_idx, end=end_idx,
             value=None, stype='sentence',
-            literals=[l for l in literals]
+            literals=literals
         )
         sentence_structures = [sentence_structure]
         # sentence metadata
@@ -395,16 +585,18 @@ class ConlluParser(FormatParser):
             sentence_structures.append(
                 Structure(
                     start=start_idx, end=end_idx,
-                    value=meta_value, stype=meta_field,
-                    literals=[l for l in literals]
+                    value=meta_value, stype=sys.intern(meta_field),
+                    literals=literals
                 )
             )
 
-        # establish sentence-level hierarchies
-        hierarchies += \
-                [(sentence_structure, token) for token in tokens_by_id.values()] + \
-                [(sentence_structure, dependency) for dependency in dependency_structures] + \
-                [(sentence_structure, sentence_annotation) for sentence_annotation in sentence_structures[1:]]
+        # establish sentence-level hierarchies (single extend, no intermediate lists)
+        hierarchies.extend(
+                (sentence_structure, substructure)
+                for substructure in itertools.chain(
+                    tokens_by_id.values(), dependency_structures, sentence_structures[1:]
+                )
+        )
 
         structures = sentence_structures + structures
 
@@ -418,13 +610,20 @@ class ConlluParser(FormatParser):
         carryover_literals = {}  # initialize cross-sentence carryover literals for paragraphs and documents
         carryover_sentences = {}  # initialize carryover sentences for paragraphs and documents
 
+        # bind hot attributes and methods once for the sentence loop
+        parse_sentence = self.parse_sentence
+        parse_carryover = self.parse_carryover
+        literal_level = self.literal_level
+        force_alignment = self.force_alignment
+        sentence_terminator = self.sentence_terminator
+
         # iterate over sentences
         for sentence in sentences:
-            cur_literals, cur_structures, cur_hierarchies, cur_carryover = self.parse_sentence(
+            cur_literals, cur_structures, cur_hierarchies, cur_carryover = parse_sentence(
                 sentence, cursor_idx,
-                literal_level=self.literal_level,
-                force_alignment=self.force_alignment,
-                sentence_terminator=self.sentence_terminator
+                literal_level=literal_level,
+                force_alignment=force_alignment,
+                sentence_terminator=sentence_terminator
             )
             cur_sentence = cur_structures[0]
             literals += cur_literals
@@ -432,7 +631,7 @@ class ConlluParser(FormatParser):
             hierarchies += cur_hierarchies
 
             # process carryover metadata
-            carryover, carryover_literals, carryover_sentences, new_structures, new_hierarchies = self.parse_carryover(
+            carryover, carryover_literals, carryover_sentences, new_structures, new_hierarchies = parse_carryover(
                 carryover, cur_carryover,
                 carryover_literals, cur_literals,
                 carryover_sentences, cur_sentence,
@@ -441,8 +640,9 @@ class ConlluParser(FormatParser):
             structures += new_structures
             hierarchies += new_hierarchies
 
-            # increment character-level cursor by number of atoms (i.e., characters)
-            cursor_idx += sum(len(literal.value) for literal in cur_literals)
+            # advance the character-level cursor to the end of the sentence span
+            # (same as summing literal lengths, without re-walking the literal list)
+            cursor_idx = cur_sentence.end
 
         # process final carryover structures
         _, _, _, new_structures, new_hierarchies = self.parse_carryover(
@@ -10,6 +10,21 @@ from decaf.index.views import construct_views
 from decaf.filters import Filter, Criterion, Condition
 
 
+#
+# constants
+#
+
+QUERY_CHUNK_SIZE = 999  # maximum number of bound parameters per query chunk (SQLite's default limit)
+
+# per-connection settings favoring large sequential reads (memory-mapped pages, larger cache)
+CONNECTION_PRAGMAS = '''
+	PRAGMA mmap_size=34359738368;
+	PRAGMA cache_size=-524288;
+	PRAGMA temp_store=MEMORY;
+	PRAGMA synchronous=NORMAL;
+'''
+
+
 #
 # helper functions
 #
@@ -58,6 +73,7 @@ class DecafIndex:
 		if self.connected_shard != shard:
 			self.disconnect()
 			self.connection = sqlite3.connect(self.shards[shard], check_same_thread=False)
+			self.connection.executescript(CONNECTION_PRAGMAS)
 			self.connected_shard = shard
 		return self.connection
 
@@ -120,13 +136,16 @@ class DecafIndex:
 		with resources.open_text('decaf.config', 'schema.sql') as fp:
 			schema = fp.read()
 		cursor.executescript(schema)
+		# new shards use WAL journaling (cheaper commits, concurrent readers during ingest)
+		cursor.execute('PRAGMA journal_mode=WAL')
 		self.commit()
 
 	@staticmethod
-	def _query_shard(query, shard):
+	def _query_shard(query, shard, parameters=None):
 		with sqlite3.connect(shard, check_same_thread=False) as connection:
+			connection.executescript(CONNECTION_PRAGMAS)
 			cursor = connection.cursor()
-			cursor.execute(query)
+			cursor.execute(query, parameters if parameters is not None else ())
 			return cursor.fetchall()
 
 	def query_shards(self, queries):
@@ -149,6 +168,33 @@ class DecafIndex:
 				for shard_result in shard_results:
 					yield shard_idx, shard_result
 
+	@staticmethod
+	def _query_shard_chunks(query, shard, parameter_chunks):
+		# repeatedly execute one query over parameter chunks on a single connection,
+		# so the statement is parsed once and re-bound per chunk
+		with sqlite3.connect(shard, check_same_thread=False) as connection:
+			connection.executescript(CONNECTION_PRAGMAS)
+			cursor = connection.cursor()
+			results = []
+			for parameters in parameter_chunks:
+				cursor.execute(query, parameters)
+				results.extend(cursor.fetchall())
+			return results
+
+	def query_shard_chunks(self, shard_queries):
+		# execute multiple parameterized query chunks per shard
+		# shard_queries: list of (shard_idx, query, parameter_chunks) tuples
+		num_cpus = max(1, mp.cpu_count()//2)  # parallelize across half of all CPUs
+		chunksize = max(1, len(shard_queries) // num_cpus)  # give each process the same number of shards
+
+		queries = [(query, self.shards[shard_idx], parameter_chunks) for shard_idx, query, parameter_chunks in shard_queries]
+
+		# distribute query chunks across shards
+		with mp.Pool(processes=num_cpus) as pool:
+			for (shard_idx, _, _), chunk_results in zip(shard_queries, pool.starmap(self._query_shard_chunks, queries, chunksize=chunksize)):
+				for chunk_result in chunk_results:
+					yield shard_idx, chunk_result
+
 	#
 	# import functions
 	#
@@ -246,25 +292,32 @@ class DecafIndex:
 		for shard, structure in structures:
 			structures_by_shard[shard].append(structure)
 
-		# construct shard-wise queries
-		queries = []
+		# one query string shared by all chunks, padded to the full chunk size (NULL parameters match no id),
+		# so every chunk re-binds the same prepared statement
+		query = f'''
+			SELECT structures.id, GROUP_CONCAT(literals.value, "") as export
+			FROM (
+				SELECT *
+				FROM structures
+				WHERE id IN ({','.join('?' * QUERY_CHUNK_SIZE)})
+			) AS structures
+			JOIN structure_literals
+			JOIN literals
+			ON (structure_literals.structure = structures.id AND structure_literals.literal = literals.id)
+			GROUP BY structures.id'''
+
+		# construct parameterized shard-wise queries in bounded chunks
+		shard_queries = []
 		for shard, shard_structures in structures_by_shard.items():
-			query = f'''
-				SELECT structures.id, GROUP_CONCAT(literals.value, "") as export 
-				FROM (
-					SELECT * 
-					FROM structures 
-					WHERE id IN ({','.join(str(sid) for sid in shard_structures)})
-				) AS structures 
-				JOIN structure_literals 
-				JOIN literals 
-				ON (structure_literals.structure = structures.id AND structure_literals.literal = literals.id) 
-				GROUP BY structures.id'''
-			queries.append(query)
+			parameter_chunks = []
+			for chunk_start in range(0, len(shard_structures), QUERY_CHUNK_SIZE):
+				chunk = shard_structures[chunk_start:chunk_start + QUERY_CHUNK_SIZE]
+				parameter_chunks.append(chunk + [None] * (QUERY_CHUNK_SIZE - len(chunk)))
+			shard_queries.append((shard, query, parameter_chunks))
 
-		# execute queries across shards
+		# execute query chunks across shards
 		shard_exports = {s:{} for s in range(len(self.shards))}
-		for shard_idx, (structure_id, export) in self.query_shards(queries=queries):
+		for shard_idx, (structure_id, export) in self.query_shard_chunks(shard_queries=shard_queries):
 			shard_exports[shard_idx][structure_id] = export
 
 		# export in original order
@@ -341,7 +394,8 @@ class DecafIndex:
 			else:
 				raise NotImplementedError(f"Unsupported output level '{output_level}'.")
 
-		query = views + f'SELECT {output_columns} FROM {relevant_view}'
+		# let SQLite emit rows pre-sorted (satisfied from the primary-key index, no sort step)
+		query = views + f'SELECT {output_columns} FROM {relevant_view} ORDER BY {output_columns}'
 
 		return query
 
@@ -596,10 +650,10 @@ class DecafIndex:
 			source_target_frequencies[(source, target)] = source_target_frequencies.get((source, target), 0) + frequency
 
 		# convert to dataframe
-		cooccurrence = pd.DataFrame([
-			{'sources': source, 'targets': target, 'frequency': frequency}
-			for (source, target), frequency in source_target_frequencies.items()
-		])
+		cooccurrence = pd.DataFrame(
+			[(source, target, frequency) for (source, target), frequency in source_target_frequencies.items()],
+			columns=['sources', 'targets', 'frequency']
+		)
 
 		# pivot co-occurrence rows to become a matrix
 		cooccurrence = cooccurrence.pivot(
@@ -1,6 +1,9 @@
 from typing import Optional
 
 class Literal:
+	# slotted layout: literals are created millions of times per import
+	__slots__ = ('start', 'end', 'value', 'id')
+
 	def __init__(self, start:int, end:int, value:str, index_id:Optional[int] = None):
 		self.start = start
 		self.end = end
@@ -1,6 +1,9 @@
 from typing import Optional, Union
 
 class Structure:
+	# slotted layout: structures are created millions of times per import
+	__slots__ = ('start', 'end', 'type', 'value', 'literals', 'id')
+
 	def __init__(self, start:int, end:int, stype:str, value:Union[str, None], literals:list, index_id:Optional[int] = None):
 		self.start = start
 		self.end = end
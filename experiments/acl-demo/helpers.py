@@ -1,12 +1,44 @@
 import itertools
+import math
 import time
 
+from collections import Counter
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-from scipy.spatial.distance import jensenshannon
+from scipy.spatial.distance import pdist, squareform
 import sqlparse
 
+# optionally compile a bulk pairwise JS divergence kernel (requires Numba)
+try:
+    import numba
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def pairwise_js(distributions):
+        # distributions: (n_rows, n_values) float64, rows sum to 1
+        # returns the raw divergences (sqrt is applied once at the matrix level)
+        num_rows, num_values = distributions.shape
+        divergences = np.zeros((num_rows, num_rows))
+        # zero-mass rows have no distribution to compare (scipy propagates NaN for them)
+        row_sums = distributions.sum(axis=1)
+        for i in numba.prange(num_rows):
+            for j in range(i + 1, num_rows):
+                if (row_sums[i] == 0.0) or (row_sums[j] == 0.0):
+                    divergences[i, j] = divergences[j, i] = np.nan
+                    continue
+                divergence = 0.0
+                for k in range(num_values):
+                    mean = .5 * (distributions[i, k] + distributions[j, k])
+                    if distributions[i, k] > 0:
+                        divergence += .5 * distributions[i, k] * math.log(distributions[i, k] / mean)
+                    if distributions[j, k] > 0:
+                        divergence += .5 * distributions[j, k] * math.log(distributions[j, k] / mean)
+                divergences[i, j] = divergences[j, i] = divergence
+        return divergences
+except ImportError:
+    pairwise_js = None
+
 
 def count_filtered(decaf_index, decaf_filter, print_sql=False, print_results=False, output_level='structures'):
     query_start_time, query_end_time = time.time(), None
@@ -26,14 +58,22 @@ def count_filtered(decaf_index, decaf_filter, print_sql=False, print_results=Fal
         output_level=output_level
     )
 
-    structure_counts = {}
-    num_matches = 0
-    for shard_idx, structure_idx, start, end, export in outputs:
-        if query_end_time is None: query_end_time = time.time()
-        structure_counts[export] = structure_counts.get(export, 0) + 1
-        if print_results:
+    structure_counts = Counter()
+    # explicit loop only when printing individual results
+    if print_results:
+        for shard_idx, structure_idx, start, end, export in outputs:
+            if query_end_time is None: query_end_time = time.time()
+            structure_counts[export] += 1
             print(f"[ID {(shard_idx, structure_idx)} | {start}-{end}] '{export}'")
-        num_matches += 1
+    # otherwise, delegate counting to a single C-level update
+    else:
+        outputs = iter(outputs)
+        first = next(outputs, None)
+        query_end_time = time.time()
+        if first is not None:
+            structure_counts[first[-1]] += 1
+            structure_counts.update(output[-1] for output in outputs)
+    num_matches = sum(structure_counts.values())
 
     print(
         f"\nCompleted retrieval of {num_matches} match(es) from DECAF index "
@@ -43,7 +83,11 @@ def count_filtered(decaf_index, decaf_filter, print_sql=False, print_results=Fal
 
 
 def plot_frequency(structure_counts):
-    structures, counts = zip(*sorted(structure_counts.items(), key=lambda i: i[1], reverse=True))
+    # sort by descending count at the C level
+    structures = np.array(list(structure_counts.keys()))
+    counts = np.fromiter(structure_counts.values(), dtype=np.int64, count=len(structure_counts))
+    order = np.argsort(-counts, kind='stable')
+    structures, counts = structures[order], counts[order]
     fig, ax = plt.subplots(figsize=(15, 6.3 * .6))
     ax.bar(structures, counts, color='sienna')
     ax.set_xticks(range(len(structures)), structures, rotation=45, ha='right')
@@ -52,8 +96,15 @@ def plot_frequency(structure_counts):
 
 
 def compute_divergence(statistics, total_sizes):
-    statistics = pd.DataFrame.from_dict(statistics, orient='index')
-    statistics = statistics.fillna(0)
+    # build a dense float frame in one allocation (instead of from_dict + fillna)
+    row_labels = list(statistics.keys())
+    all_columns = sorted(set().union(*(row.keys() for row in statistics.values())))
+    column_indices = {column: column_idx for column_idx, column in enumerate(all_columns)}
+    counts = np.zeros((len(row_labels), len(all_columns)))
+    for row_idx, row in enumerate(statistics.values()):
+        for column, count in row.items():
+            counts[row_idx, column_indices[column]] = count
+    statistics = pd.DataFrame(counts, index=row_labels, columns=pd.MultiIndex.from_tuples(all_columns))
     # add 'other' columns to single-value groups
     group_values = {}
     for (group, value) in statistics.columns:
@@ -74,27 +125,29 @@ def compute_divergence(statistics, total_sizes):
         normalized[(group, value)] /= group_totals[group]
 
     # compute JS divergence within each group
-    divergence = np.zeros((len(normalized), len(normalized)))
+    groups = list(normalized.T.groupby(level=0))
+    per_group = np.zeros((len(groups), len(normalized), len(normalized)))
     divergence_by_comparison = {}
 
     # iterate over groups
-    for group, group_frame in normalized.T.groupby(level=0):
-        # iterate over all pairs of rows
+    for group_idx, (group, group_frame) in enumerate(groups):
+        # hoist the transposed values and row labels out of the pairwise loop
+        gmat = group_frame.values.T  # shape (n_rows, n_values)
+        row_labels = list(group_frame.columns)
+
+        # compute all pairwise divergences within the group at once
+        if pairwise_js is not None:
+            # apply the deferred sqrt as one vectorized pass over the group matrix
+            per_group[group_idx] = np.sqrt(pairwise_js(np.ascontiguousarray(gmat, dtype=np.float64)))
+        else:
+            per_group[group_idx] = squareform(pdist(gmat, 'jensenshannon'))
+
+        # store individual comparisons
         for i, j in itertools.combinations(range(len(normalized)), 2):
-            p = group_frame.T.iloc[i].values
-            q = group_frame.T.iloc[j].values
-
-            js = jensenshannon(p, q)
-
-            # store individual comparison
-            divergence_by_comparison[(group_frame.T.index[i], group_frame.T.index[j], group)] = float(js)
-
-            # fill the symmetric matrix
-            divergence[i, j] += js
-            divergence[j, i] += js
+            divergence_by_comparison[(row_labels[i], row_labels[j], group)] = float(per_group[group_idx, i, j])
 
     # take mean over all groups
-    divergence /= len(group_totals)
+    divergence = per_group.mean(axis=0)
 
     return divergence, divergence_by_comparison, statistics
 
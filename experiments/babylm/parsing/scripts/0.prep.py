@@ -4,9 +4,6 @@ import nltk
 nltk.download('punkt_tab')
 
 for dataset in myutils.datasets:
-    out_file = open(myutils.data_folder + dataset +  '.sents', 'w')
-    for line in open(myutils.data_folder + dataset):
-        for line in sent_tokenize(line):
-            out_file.write(line + '\n')
-    out_file.close()
-
+    with open(myutils.data_folder + dataset) as in_file, \
+         open(myutils.data_folder + dataset + '.sents', 'w', buffering=1<<20) as out_file:
+        out_file.writelines(sentence + '\n' for line in in_file for sentence in sent_tokenize(line))
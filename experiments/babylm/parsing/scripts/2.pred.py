@@ -15,15 +15,16 @@ def getModel(name):
     return ''
 
 datasets = [dataset.replace('.json', '') for dataset in os.listdir('configs') if dataset.startswith('UD')]
+dev_paths = {dataset: json.load(open(f'configs/{dataset}.json'))['UD_EWT']['dev_data_path'] for dataset in datasets}
 
 for lm in myutils.lms:
+    short_lm = lm.split('/')[-1]
     for src_dataset in datasets:
-        name = src_dataset + '.' + lm.split('/')[-1]
+        name = f'{src_dataset}.{short_lm}'
         model_path = getModel(name)
         if model_path != '':
-            for tgt_dataset  in datasets:
-                
-                out_path = '../preds/' + name + '-' + tgt_dataset
-                dev_path = json.load(open('configs/' + tgt_dataset + '.json'))['UD_EWT']['dev_data_path']
-                cmd = 'python3 predict.py ' + model_path.replace('machamp/', '') + ' ' + dev_path + ' ' + out_path
+            stripped_model = model_path.replace('machamp/', '')
+            for tgt_dataset in datasets:
+                out_path = f'../preds/{name}-{tgt_dataset}'
+                cmd = f'python3 predict.py {stripped_model} {dev_paths[tgt_dataset]} {out_path}'
                 print(cmd)
@@ -3,6 +3,8 @@ import pprint
 import os
 import myutils
 
+from itertools import islice
+
 
 name = 'UD_English-GUM.deberta-v3-large'
 
@@ -16,15 +18,23 @@ def getModel(name):
                 return modelPath
     return ''
 
+def splitFile(path, linesPerShard=250000):
+    shardPaths = []
+    with open(path) as inFile:
+        for shardIdx, chunk in enumerate(iter(lambda: list(islice(inFile, linesPerShard)), [])):
+            shardPath = path + '.a' + chr(ord('a') + shardIdx)
+            with open(shardPath, 'w', buffering=1<<20) as outFile:
+                outFile.writelines(chunk)
+            shardPaths.append(shardPath)
+    return shardPaths
+
+model_path = getModel(name)
+stripped_model = model_path.replace('machamp/', '')
+
 for dataset in myutils.datasets:
-    path = 'train_100M/' + dataset + '.sents'
-    model_path = getModel(name)
-    split_cmd = 'split ' + path + ' -l 250000 ' + path + '.'
-    os.system(split_cmd)
-    for i in range(26):
-        split = 'a' + chr(ord('a') + i)
-        split_file = '../' + path + '.' + split
-        if os.path.isfile(split_file[3:]):
-            cmd = 'python3 predict.py ' + model_path.replace('machamp/', '') + ' ' + split_file + ' ' + split_file + '.conllu --raw_text' 
-            print(cmd)
+    path = f'train_100M/{dataset}.sents'
+    for shard_path in splitFile(path):
+        split_file = f'../{shard_path}'
+        cmd = f'python3 predict.py {stripped_model} {split_file} {split_file}.conllu --raw_text'
+        print(cmd)
 
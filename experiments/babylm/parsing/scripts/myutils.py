@@ -1,3 +1,5 @@
+import os
+
 datasets = ['bnc_spoken.train', 'childes.train', 'gutenberg.train', 'open_subtitles.train', 'simple_wiki.train', 'switchboard.train']
 
 data_folder = 'train_100M/'
@@ -6,16 +8,15 @@ data_folder = 'train_100M/'
 lms = ['xlm-roberta-large', 'studio-ousia/mluke-large', 'studio-ousia/luke-large', 'microsoft/deberta-v3-large', 'Twitter/twhin-bert-large']
 
 def getTrainDevTest(path):
-    train = ''
-    dev = ''
-    test = ''
-    for conlFile in os.listdir(path):
-        if conlFile.endswith('conllu'):
-            if 'train' in conlFile:
-                train = path + '/' + conlFile
-            if 'dev' in conlFile:
-                dev = path + '/' + conlFile
-            if 'test' in conlFile:
-                test = path + '/' + conlFile
-    return train, dev, test
+    kinds = {'train': '', 'dev': '', 'test': ''}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            conlFile = entry.name
+            if not conlFile.endswith('conllu'):
+                continue
+            for kind in kinds:
+                if kind in conlFile:
+                    kinds[kind] = path + '/' + conlFile
+                    break
+    return kinds['train'], kinds['dev'], kinds['test']
 
@@ -1,4 +1,5 @@
 import argparse
+import heapq
 import math
 import os
 import pickle
@@ -403,7 +404,8 @@ def extract_ordered_ranges(index_path, content_filters, f_filters, m_filters, ou
 def print_ranges(decaf_index, filter_ranges):
 	for filter_name, ranges in filter_ranges.items():
 		print(f"Matches for '{filter_name}' (N={len(ranges)}):")
-		for (shard_idx, structure_id, start, end), export in zip(ranges, decaf_index.export_ranges(sorted(ranges)[:10])):
+		head_ranges = heapq.nsmallest(10, ranges)
+		for (shard_idx, structure_id, start, end), export in zip(head_ranges, decaf_index.export_ranges(head_ranges)):
 			print(f"[ID ({shard_idx}/{structure_id}) | {start}-{end}] '{export}'")
 		print("...")
 
@@ -1,12 +1,22 @@
 import argparse
+import hashlib
 import math
 import os
 import pickle
-import random
+import sys
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
 from decaf.index import DecafIndex
-from decaf.constraints import Filter, Criterion, Condition
+from decaf.filters import Filter, Criterion, Condition
+
+# structured dtype for (shard, structure, start, end) filter ranges
+RANGE_DTYPE = np.dtype([('shard', np.int64), ('structure', np.int64), ('start', np.int64), ('end', np.int64)])
+# structured dtype for corpus-level ranges prefixed with their index position
+CORPUS_RANGE_DTYPE = np.dtype([('index', np.int64)] + RANGE_DTYPE.descr)
 
 # WinoBias constants
 WINOBIAS_OCCUPATIONS = ['carpenter', 'editor', 'mechanician', 'designer', 'construction worker', 'accountant', 'laborer', 'auditor', 'driver', 'writer', 'sheriff', 'baker', 'mover', 'clerk', 'developer', 'cashier', 'farmer', 'counselor', 'guard', 'attendant' 'chief', 'teacher', 'janitor', 'sewer', 'lawyer', 'librarian', 'cook', 'assistant', 'physician', 'cleaner', 'CEO', 'housekeeper', 'analyst', 'nurse', 'manager', 'receptionist', 'supervisor', 'hairdresser', 'salesperson', 'secretary']
@@ -61,25 +71,86 @@ def build_content_filters():
 	return filters
 
 
-def apply_filters(decaf_index, decaf_filters):
+def ranges_to_array(ranges):
+	# convert an iterable of (shard, structure, start, end) tuples into a sorted, unique structured array
+	ranges = np.array(list(ranges), dtype=RANGE_DTYPE)
+	# rows arrive pre-sorted from the filter query, so the stable sort reduces to a linear verification pass
+	ranges = np.sort(ranges, kind='stable')
+	if len(ranges) > 1:
+		ranges = ranges[np.concatenate(([True], ranges[1:] != ranges[:-1]))]
+	return ranges
+
+
+def union_ranges(*ranges):
+	# merge sorted range arrays into one sorted, unique array
+	return np.unique(np.concatenate(ranges))
+
+
+def difference_ranges(ranges_a, ranges_b):
+	# sorted ranges in A but not in B (one linear C-level merge)
+	return np.setdiff1d(ranges_a, ranges_b, assume_unique=True)
+
+
+def intersect_ranges(ranges_a, ranges_b):
+	# sorted ranges occurring in both A and B
+	return np.intersect1d(ranges_a, ranges_b, assume_unique=True)
+
+
+def prefix_ranges(index_idx, ranges):
+	# prepend the index position to each (shard, structure, start, end) range
+	prefixed = np.empty(len(ranges), dtype=CORPUS_RANGE_DTYPE)
+	prefixed['index'] = index_idx
+	for field in RANGE_DTYPE.names:
+		prefixed[field] = ranges[field]
+	return prefixed
+
+
+def get_filter_cache_path(cache_dir, index_path, decaf_filter):
+	# key on the filter contents and the index modification time
+	filter_hash = hashlib.blake2b(pickle.dumps(decaf_filter, protocol=5)).hexdigest()
+	index_mtime = os.stat(index_path).st_mtime_ns
+	return os.path.join(cache_dir, f'{filter_hash}-{index_mtime}.npy')
+
+
+def apply_filter(decaf_index, decaf_filter, cache_path=None):
+	query_start_time = time.time()
+	# if available, load cached filter ranges (mapped into memory on demand)
+	if (cache_path is not None) and os.path.exists(cache_path):
+		ranges = np.load(cache_path, mmap_mode='r')
+	# otherwise, query the index and cache the resulting ranges
+	else:
+		ranges = ranges_to_array(decaf_index.get_filter_ranges(constraint=decaf_filter))
+		if cache_path is not None:
+			np.save(cache_path, ranges)
+	return ranges, time.time() - query_start_time
+
+
+def apply_filters(decaf_index, decaf_filters, cache_dir=None):
 	filter_ranges = {}
-	for filter_idx, (filter_name, decaf_filter) in enumerate(decaf_filters.items()):
-		print(f"[{filter_idx+1}] Applying '{filter_name}' filter...", end='', flush=True)
-		query_start_time = time.time()
-		filter_ranges[filter_name] = set()
-		for filter_range in decaf_index.get_filter_ranges(constraint=decaf_filter):
-			filter_ranges[filter_name].add(filter_range)
-		query_end_time = time.time()
-		print(f"found {len(filter_ranges[filter_name])} matches in {query_end_time - query_start_time:.2f}s.")
+	# overlap the independent filter queries (each query runs on its own SQLite connections)
+	with ThreadPoolExecutor(max_workers=len(decaf_filters)) as executor:
+		futures = {
+			filter_name: executor.submit(
+				apply_filter, decaf_index, decaf_filter,
+				cache_path=None if cache_dir is None else get_filter_cache_path(cache_dir, decaf_index.index_path, decaf_filter)
+			)
+			for filter_name, decaf_filter in decaf_filters.items()
+		}
+		for filter_idx, (filter_name, future) in enumerate(futures.items()):
+			filter_ranges[filter_name], query_time = future.result()
+			print(f"[{filter_idx+1}] Applied '{filter_name}' filter: found {len(filter_ranges[filter_name])} matches in {query_time:.2f}s.")
 	return filter_ranges
 
 
 def order_by_specificity(content_ranges, positive_ranges, negative_ranges):
-	def append_and_reduce(ranges, new_set):
-		ranges.append(new_set)
-		if len(ranges) > 1:
-			ranges[-1] -= set.union(*ranges[:-1])
-		print(f"[{len(ranges)}] Created filter range with {len(ranges[-1])} entries from {len(new_set)} ranges.")
+	running_union = np.empty(0, dtype=RANGE_DTYPE)
+
+	def append_and_reduce(ranges, new_ranges):
+		nonlocal running_union
+		# reduce against the running union instead of re-unioning all previous ranges per call
+		ranges.append(difference_ranges(new_ranges, running_union))
+		running_union = union_ranges(running_union, new_ranges)
+		print(f"[{len(ranges)}] Created filter range with {len(ranges[-1])} entries from {len(new_ranges)} ranges.")
 		return ranges
 
 	ordered_ranges = []
@@ -87,19 +158,22 @@ def order_by_specificity(content_ranges, positive_ranges, negative_ranges):
 	# single-gender + pronoun + occupation
 	ordered_ranges = append_and_reduce(
 		ordered_ranges,
-		positive_ranges[('pron',)] - negative_ranges[('pron',)] & content_ranges['occupations']
+		intersect_ranges(
+			difference_ranges(positive_ranges[('pron',)], negative_ranges[('pron',)]),
+			content_ranges['occupations']
+		)
 	)
 
 	# single-gender + pronoun
 	ordered_ranges = append_and_reduce(
 		ordered_ranges,
-		positive_ranges[('pron',)] - negative_ranges[('pron',)]
+		difference_ranges(positive_ranges[('pron',)], negative_ranges[('pron',)])
 	)
 
 	# mixed-gender + pronoun + occupation
 	ordered_ranges = append_and_reduce(
 		ordered_ranges,
-		positive_ranges[('pron',)] & content_ranges['occupations']
+		intersect_ranges(positive_ranges[('pron',)], content_ranges['occupations'])
 	)
 
 	# mixed-gender + pronoun
@@ -118,23 +192,33 @@ def extract_ordered_ranges(index_path, content_filters, f_filters, m_filters, ou
 	decaf_index = DecafIndex(index_path=index_path)
 	print(f"Loaded DECAF Index: {decaf_index}.")
 
-	# apply filters
-	print("Retrieving all original sentences...")
-	sentence_ranges = apply_filters(
+	# set up on-disk cache for filter ranges
+	cache_dir = os.path.join(output, '_filter_cache')
+	if not os.path.exists(cache_dir):
+		os.mkdir(cache_dir)
+
+	# apply sentence, content, and gendered filters concurrently
+	print("Applying sentence, content, and gendered filters...")
+	all_ranges = apply_filters(
 		decaf_index,
-		decaf_filters={'sentences': Filter([Criterion([Condition(stype='sentence')])])}
+		decaf_filters={
+			('sentences',): Filter([Criterion([Condition(stype='sentence')])]),
+			('occupations',): content_filters['occupations'],
+			('Fem', 'pron'): f_filters[('pron',)],
+			('Masc', 'pron'): m_filters[('pron',)]
+		},
+		cache_dir=cache_dir
 	)
+	# split results into their filter groups
+	sentence_ranges = {'sentences': all_ranges[('sentences',)]}
+	content_ranges = {'occupations': all_ranges[('occupations',)]}
+	f_ranges = {('pron',): all_ranges[('Fem', 'pron')]}
+	m_ranges = {('pron',): all_ranges[('Masc', 'pron')]}
 	print(f"Identified {sum(len(r) for r in sentence_ranges.values())} sentences.")
-	print("Applying content-based filters...")
-	content_ranges = apply_filters(decaf_index, content_filters)
 	print(f"Identified {sum(len(r) for r in content_ranges.values())} relevant content ranges.")
-	print("Applying Fem-gendered filters...")
-	f_ranges = apply_filters(decaf_index, f_filters)
 	print(f"Identified {sum(len(r) for r in f_ranges.values())} Fem-gendered ranges.")
-	print("Applying Masc-gendered filters...")
-	m_ranges = apply_filters(decaf_index, m_filters)
 	print(f"Identified {sum(len(r) for r in m_ranges.values())} Masc-gendered ranges.")
-	print(f"Identified a total of {len(set.union(*f_ranges.values()) | set.union(*m_ranges.values()))} unique gendered ranges.")
+	print(f"Identified a total of {len(union_ranges(*f_ranges.values(), *m_ranges.values()))} unique gendered ranges.")
 
 	# print matched structures
 	print_ranges(decaf_index, content_ranges)
@@ -145,9 +229,12 @@ def extract_ordered_ranges(index_path, content_filters, f_filters, m_filters, ou
 	ordered_ranges_f, ordered_ranges_fm = order_by_specificity(content_ranges, f_ranges, m_ranges)
 	ordered_ranges_m, ordered_ranges_mf = order_by_specificity(content_ranges, m_ranges, f_ranges)
 	# merge mixed ranges
-	ordered_ranges_x = [fm | mf for fm, mf in zip(ordered_ranges_fm, ordered_ranges_mf)]
+	ordered_ranges_x = [union_ranges(fm, mf) for fm, mf in zip(ordered_ranges_fm, ordered_ranges_mf)]
 	# get all non-gendered sentences
-	other_ranges = [sentence_ranges['sentences'] - (set.union(*ordered_ranges_f) | set.union(*ordered_ranges_m) | set.union(*ordered_ranges_x))]
+	other_ranges = [difference_ranges(
+		sentence_ranges['sentences'],
+		union_ranges(*ordered_ranges_f, *ordered_ranges_m, *ordered_ranges_x)
+	)]
 	# export ordered ranges
 	ordered_ranges = {
 		'f': ordered_ranges_f,
@@ -156,26 +243,42 @@ def extract_ordered_ranges(index_path, content_filters, f_filters, m_filters, ou
 		'o': other_ranges
 	}
 
-	# export ranges
+	# export ranges (one memory-mappable file per category and specificity)
 	index_output_path = os.path.join(output, os.path.basename(index_path))
 	if not os.path.exists(index_output_path):
 		os.mkdir(index_output_path)
-	with open(os.path.join(index_output_path, 'ordered_ranges.pkl'), 'wb') as fp:
-		pickle.dump(ordered_ranges, fp)
-		print(f"Exported ordered ranges to '{os.path.join(index_output_path, 'ordered_ranges.pkl')}'.")
+	for category, category_ranges in ordered_ranges.items():
+		for specificity, ranges in enumerate(category_ranges):
+			np.save(os.path.join(index_output_path, f'ordered-ranges-{category}{specificity}.npy'), ranges)
+	print(f"Exported ordered ranges to '{index_output_path}'.")
+
+	return ordered_ranges
+
 
+def load_ordered_ranges(index_output_path):
+	# map the per-category range files into memory (pages are only read on access)
+	ordered_ranges = {}
+	for category in ('f', 'm', 'x', 'o'):
+		ordered_ranges[category] = []
+		ranges_path = os.path.join(index_output_path, f'ordered-ranges-{category}0.npy')
+		while os.path.exists(ranges_path):
+			ordered_ranges[category].append(np.load(ranges_path, mmap_mode='r'))
+			ranges_path = os.path.join(index_output_path, f'ordered-ranges-{category}{len(ordered_ranges[category])}.npy')
 	return ordered_ranges
 
 
 def print_ranges(decaf_index, filter_ranges):
 	for filter_name, ranges in filter_ranges.items():
 		print(f"Matches for '{filter_name}' (N={len(ranges)}):")
-		for (shard_idx, structure_id, start, end), export in zip(ranges, decaf_index.export_ranges(sorted(ranges)[:10])):
+		head_ranges = ranges[:10].tolist()
+		for (shard_idx, structure_id, start, end), export in zip(head_ranges, decaf_index.export_ranges(head_ranges)):
 			print(f"[ID ({shard_idx}/{structure_id}) | {start}-{end}] '{export}'")
 		print("...")
 
 
 def write_corpus(decaf_indices, ranges, corpus_path):
+	# convert to plain tuples once (structure IDs are bound as SQL parameters downstream)
+	ranges = ranges.tolist()
 	structures_by_index = {i:[] for i in range(len(decaf_indices))}
 	for index_idx, shard, structure, start, end in ranges:
 		structures_by_index[index_idx].append((shard, structure))
@@ -190,39 +293,44 @@ def write_corpus(decaf_indices, ranges, corpus_path):
 		print("done.")
 
 	with open(corpus_path, 'w') as corpus_file:
+		write_buffer = []
+		last_progress_time = 0.0
 		for line_idx, (index_idx, shard, structure, start, end) in enumerate(ranges):
-			print(f"\x1b[1K\r[{line_idx + 1}/{len(ranges)} | {(line_idx + 1)/len(ranges):.2%}] Exporting corpus...", end='', flush=True)
-			export = index_exports[index_idx][(shard, structure)]
-			corpus_file.write(export + '\n')
+			write_buffer.append(index_exports[index_idx][(shard, structure)])
+			write_buffer.append('\n')
+			# flush buffered lines every 10k ranges
+			if len(write_buffer) >= 20000:
+				corpus_file.writelines(write_buffer)
+				write_buffer.clear()
+				# update progress on interactive terminals only, at most a few times per second
+				if sys.stdout.isatty() and (time.monotonic() - last_progress_time > .2):
+					last_progress_time = time.monotonic()
+					print(f"\x1b[1K\r[{line_idx + 1}/{len(ranges)} | {(line_idx + 1)/len(ranges):.2%}] Exporting corpus...", end='', flush=True)
+		corpus_file.writelines(write_buffer)
 	print("completed.")
 	print(f"Exported corpus with {len(ranges)} total ranges to '{corpus_path}'.")
 
 
-def export_ranges(index_paths, start_gender, end_gender, grouped_ranges, interleave_positions, output):
+def export_ranges(index_paths, start_gender, end_gender, grouped_ranges, interleave_mask, output):
 	decaf_indices = [DecafIndex(index_path=ip) for ip in index_paths]
 
-	gendered_ranges = \
-		[r for o in grouped_ranges[start_gender] for r in o] + \
-		[r for o in grouped_ranges['x'] for r in o] + \
-		[r for o in reversed(grouped_ranges[end_gender]) for r in o]
+	gendered_ranges = np.concatenate(
+		list(grouped_ranges[start_gender]) +
+		list(grouped_ranges['x']) +
+		list(reversed(grouped_ranges[end_gender]))
+	)
 	other_ranges = grouped_ranges['o'][0]
 
-	# generate final data order
-	corpus_cursor, gendered_cursor, other_cursor = 0, 0, 0
+	# generate final data order with two vectorized scatters (gendered ranges at mask positions, others in between)
 	total_ranges = sum(sum(len(r) for r in o) for o in grouped_ranges.values())
-	final_order = []
-	while corpus_cursor < total_ranges:
-		if corpus_cursor in interleave_positions:
-			index_idx, shard, structure, start, end = gendered_ranges[gendered_cursor]
-			gendered_cursor += 1
-		else:
-			index_idx, shard, structure, start, end = other_ranges[other_cursor]
-			other_cursor += 1
-		final_order.append((index_idx, shard, structure, start, end))
-		corpus_cursor += 1
+	gendered_positions = np.flatnonzero(interleave_mask)
+	other_positions = np.flatnonzero(~interleave_mask)
+	final_order = np.empty(total_ranges, dtype=CORPUS_RANGE_DTYPE)
+	final_order[gendered_positions] = gendered_ranges[:len(gendered_positions)]
+	final_order[other_positions] = other_ranges[:len(other_positions)]
 	output_order_path = os.path.join(output, f'corpus-order-{start_gender}-{end_gender}.pkl')
 	with open(output_order_path, 'wb') as fp:
-		pickle.dump(final_order, fp)
+		pickle.dump(final_order, fp, protocol=5)
 	print(f"Exported final data order to '{output_order_path}'.")
 
 	# export ordered data
@@ -231,7 +339,7 @@ def export_ranges(index_paths, start_gender, end_gender, grouped_ranges, interle
 
 def main():
 	args = parse_arguments()
-	random.seed(args.seed)
+	rng = np.random.default_rng(args.seed)
 
 	# construct WinoBias filters
 	f_filters = build_gendered_filters('Fem')
@@ -242,12 +350,11 @@ def main():
 	ordered_ranges = {'f': [], 'm': [], 'x': [], 'o': []}
 	for index_idx, index_path in enumerate(args.indices):
 		index_name = os.path.basename(index_path)
-		# if available, load ordered ranges
-		ranges_path = os.path.join(args.output, os.path.basename(index_path), 'ordered_ranges.pkl')
-		if os.path.exists(ranges_path):
-			with open(ranges_path, 'rb') as fp:
-				cur_ordered_ranges = pickle.load(fp)
-			print(f"Loaded existing ordered ranges from '{ranges_path}'.")
+		# if available, load ordered ranges (memory-mapped, paged in on demand)
+		index_output_path = os.path.join(args.output, index_name)
+		if os.path.exists(os.path.join(index_output_path, 'ordered-ranges-o0.npy')):
+			cur_ordered_ranges = load_ordered_ranges(index_output_path)
+			print(f"Loaded existing ordered ranges from '{index_output_path}'.")
 		# compute ranges from scratch
 		else:
 			cur_ordered_ranges = extract_ordered_ranges(index_path, content_filters, f_filters, m_filters, args.output)
@@ -257,18 +364,24 @@ def main():
 			for specificity, ranges in enumerate(cur_ordered_ranges[category]):
 				if specificity >= len(ordered_ranges[category]):
 					ordered_ranges[category].append([])
-				ordered_ranges[category][specificity] += [(index_idx,) + r for r in sorted(ranges)]
+				# prefix each range array with the index position (concatenated once below)
+				ordered_ranges[category][specificity].append(prefix_ranges(index_idx, ranges))
 			print(f"  * {category}: {sum(len(r) for r in cur_ordered_ranges[category])}")
 
+	# concatenate the per-index range arrays into one flat array per category and specificity
+	for category in ordered_ranges:
+		for specificity in range(len(ordered_ranges[category])):
+			ordered_ranges[category][specificity] = np.concatenate(ordered_ranges[category][specificity])
+
 	# balance pronouns in each specificity level
 	print("Balancing pronoun proportions in each specificity level:")
 	for specificity in range(len(ordered_ranges['f'])):
 		f_size, m_size = len(ordered_ranges['f'][specificity]), len(ordered_ranges['m'][specificity])
 		min_size = min(f_size, m_size)
 		if f_size >= min_size:
-			ordered_ranges['f'][specificity] = random.sample(ordered_ranges['f'][specificity], min_size)
+			ordered_ranges['f'][specificity] = rng.choice(ordered_ranges['f'][specificity], size=min_size, replace=False)
 		if m_size >= min_size:
-			ordered_ranges['m'][specificity] = random.sample(ordered_ranges['m'][specificity], min_size)
+			ordered_ranges['m'][specificity] = rng.choice(ordered_ranges['m'][specificity], size=min_size, replace=False)
 		print(f"[{specificity}] Sampled {f_size} -> {min_size} (f) and {m_size} -> {min_size} (m).")
 
 	print("Sizes for each specificity level:")
@@ -280,22 +393,24 @@ def main():
 	total_sentences = sum(sum(len(s) for s in r) for r in ordered_ranges.values())
 	total_gendered = total_sentences - len(ordered_ranges['o'][0])
 	insert_steps = total_sentences // total_gendered
-	interleave_positions = list(range(0, total_sentences, insert_steps))
+	interleave_mask = np.zeros(total_sentences, dtype=bool)
+	interleave_mask[::insert_steps] = True
 	# even out the interleave
-	if len(interleave_positions) > total_gendered:
-		overhang = len(interleave_positions) - total_gendered
-		interleave_positions = interleave_positions[:len(interleave_positions)//2 - overhang//2] + interleave_positions[len(interleave_positions)//2 + math.ceil(overhang/2):]
-	interleave_positions = set(interleave_positions)
+	num_positions = int(interleave_mask.sum())
+	if num_positions > total_gendered:
+		overhang = num_positions - total_gendered
+		positions = np.flatnonzero(interleave_mask)
+		interleave_mask[positions[num_positions//2 - overhang//2:num_positions//2 + math.ceil(overhang/2)]] = False
 	print(f"Interleaving a total of {total_gendered} gendered sentences every {insert_steps} steps across {total_sentences} total sentences.")
 
 	# shuffle order within each data category
 	for category in ordered_ranges:
 		for specificity in range(len(ordered_ranges[category])):
-			random.shuffle(ordered_ranges[category][specificity])
+			rng.shuffle(ordered_ranges[category][specificity])
 
 	# export final datasets
-	export_ranges(args.indices, 'f', 'm', ordered_ranges, interleave_positions, args.output)
-	export_ranges(args.indices, 'm', 'f', ordered_ranges, interleave_positions, args.output)
+	export_ranges(args.indices, 'f', 'm', ordered_ranges, interleave_mask, args.output)
+	export_ranges(args.indices, 'm', 'f', ordered_ranges, interleave_mask, args.output)
 
 
 if __name__ == '__main__':
@@ -1,4 +1,6 @@
 import argparse
+import sys
+import time
 
 from decaf.index import DecafIndex
 
@@ -32,9 +34,13 @@ def main():
 		output_file = open(args.output, 'w')
 
 	# export relevant structures
+	last_progress_time = 0.0
 	for export_idx, export in enumerate(decaf_index.export_structures(structures=structures)):
 		if output_file:
-			print(f"\x1b[1K\r[{export_idx + 1}/{len(structures)}] Exporting {args.structure} structures...", end='', flush=True)
+			# update progress on interactive terminals only, at most a few times per second
+			if sys.stdout.isatty() and (time.monotonic() - last_progress_time > .25):
+				last_progress_time = time.monotonic()
+				print(f"\x1b[1K\r[{export_idx + 1}/{len(structures)}] Exporting {args.structure} structures...", end='', flush=True)
 			output_file.write(export + args.separator)
 		else:
 			print(export, end=args.separator)
@@ -68,7 +68,6 @@ def main():
 		print('```')
 		print("Querying index...")
 		query_start_time = time.time()
-		query_total_time = 0
 
 		outputs = di.filter(constraint=constraint, output_level=output_level)
 
@@ -79,12 +78,11 @@ def main():
 
 		num_matches = 0
 		for shard_idx, structure_id, start, end, export in outputs:
-			query_total_time += time.time() - query_start_time
 			print(f"\n[ID ({shard_idx}/{structure_id}) | {start}-{end}] '{export}'")
 			if output_file is not None:
 				output_file.write(export + '\n')
 			num_matches += 1
-			query_start_time = time.time()
+		query_total_time = time.time() - query_start_time
 
 		if output_file is not None:
 			output_file.close()
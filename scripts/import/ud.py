@@ -1,8 +1,14 @@
 import argparse
-import copy
 import multiprocessing as mp
+import queue
+import sys
+import threading
 import time
 
+from concurrent.futures import ProcessPoolExecutor
+
+from conllu import parse as parse_conllu
+
 from decaf.formats.conllu import ConlluBatcher, ConlluParser
 from decaf.index import DecafIndex
 
@@ -22,6 +28,7 @@ def parse_arguments():
     parser.add_argument('--threads', type=int, default=mp.cpu_count(), help='number of workers (default: #CPUs)')
     parser.add_argument('--batch-size', type=int, default=1, help='number of sentences per batch, overriden by document boundaries (default: 1)')
     parser.add_argument('--shard-size', type=int, default=10000, help='number of sentences per shard (default: 10k)')
+    parser.add_argument('--flush-rows', type=int, default=FLUSH_ROWS, help='minimum number of pending literals before flushing to the shard (default: 10k)')
     return parser.parse_args()
 
 
@@ -30,49 +37,98 @@ def gen_shards(conllu_file, batch_size, shard_size):
     num_shards = 0
     shard_batches = []
     with ConlluBatcher(file=conllu_file) as batcher:
-        for batch in batcher.get_batches(batch_size=batch_size):
+        # batches of raw sentence blocks, joined into one string each
+        # (a single str per batch pickles far cheaper than a list of blocks; workers parse the text)
+        for batch in batcher.get_raw_batches(batch_size=batch_size):
             # check if new shard should be created (batches respect document boundaries)
             if (sentence_idx // shard_size) > num_shards:
                 yield num_shards, sentence_idx, shard_batches
                 num_shards += 1
                 shard_batches = []
-            shard_batches.append(batch)
+            shard_batches.append('\n'.join(batch))
             sentence_idx += len(batch)
         if len(shard_batches) > 0:
             yield num_shards, sentence_idx, shard_batches
             num_shards += 1
 
 
-def shard_worker(decaf_index, conllu_parser, shard, batches):
+FLUSH_ROWS = 10000  # default minimum number of pending literals before flushing to the shard
+
+
+# read-only worker state, shared across tasks via the pool initializer
+_worker_state = {}
+
+
+def init_shard_worker(index_path, conllu_parser, commit_steps=None, flush_rows=FLUSH_ROWS):
+    _worker_state['index_path'] = index_path
+    _worker_state['conllu_parser'] = conllu_parser
+    _worker_state['commit_steps'] = commit_steps
+    _worker_state['flush_rows'] = flush_rows
+
+
+def shard_worker(shard, batches):
+    # re-open the index locally instead of shipping a deep copy per shard
+    decaf_index = DecafIndex(index_path=_worker_state['index_path'])
+    conllu_parser = _worker_state['conllu_parser']
+    commit_steps = _worker_state['commit_steps']
+    flush_rows = _worker_state['flush_rows']
+
     cursor_idx = 0
     sentence_idx = 0
-    shard_literal_ids = []
-    shard_structure_ids = []
+    pending_literals, pending_structures, pending_hierarchies = [], [], []
 
     # connect to specified shard
     decaf_index.connect(shard=shard)
     # iterate over batches
-    for batch in batches:
-        # parse batch
-        batch_cursor, batch_literals, batch_structures, batch_hierarchies = conllu_parser.parse(batch, cursor_idx=cursor_idx)
+    for batch_idx, batch in enumerate(batches):
+        # parse batch (raw CoNLL-U text into sentences, then into index rows)
+        sentences = parse_conllu(batch)
+        batch_cursor, batch_literals, batch_structures, batch_hierarchies = conllu_parser.parse(sentences, cursor_idx=cursor_idx)
 
-        # write to database at relevant shard
-        decaf_index.add(literals=batch_literals, structures=batch_structures, hierarchies=batch_hierarchies)
+        # accumulate parsed rows and flush in bulk to amortize per-insert overhead
+        pending_literals += batch_literals
+        pending_structures += batch_structures
+        pending_hierarchies += batch_hierarchies
+        if len(pending_literals) >= flush_rows:
+            decaf_index.add(literals=pending_literals, structures=pending_structures, hierarchies=pending_hierarchies)
+            # reuse the buffers across flushes (add() consumes them synchronously)
+            pending_literals.clear()
+            pending_structures.clear()
+            pending_hierarchies.clear()
 
-        # gather literal/structure IDs
-        shard_literal_ids += [literal.id for literal in batch_literals]
-        shard_structure_ids += [structure.id for structure in batch_structures]
         # update global cursors
         cursor_idx = batch_cursor
-        sentence_idx += len(batch)
+        sentence_idx += len(sentences)
+
+        # optionally perform a backup commit (the shard is otherwise one transaction)
+        if (commit_steps is not None) and ((batch_idx + 1) % commit_steps == 0):
+            if len(pending_literals) > 0:
+                decaf_index.add(literals=pending_literals, structures=pending_structures, hierarchies=pending_hierarchies)
+                pending_literals.clear()
+                pending_structures.clear()
+                pending_hierarchies.clear()
+            decaf_index.commit()
+    # flush remaining rows
+    if len(pending_literals) > 0:
+        decaf_index.add(literals=pending_literals, structures=pending_structures, hierarchies=pending_hierarchies)
     # close database connection
     decaf_index.disconnect()
-    del decaf_index
 
-    return cursor_idx, sentence_idx, shard_literal_ids, shard_structure_ids
+    return cursor_idx, sentence_idx
+
+
+# timestamp of the last progress update (throttles terminal output in the hot loop)
+_last_progress_time = 0.0
 
 
 def print_progress(num_sentences, num_indexed_sentences, num_shards, loading=False):
+    global _last_progress_time
+    # only render in-place progress on interactive terminals, at most a few times per second
+    if not sys.stdout.isatty():
+        return
+    if time.monotonic() - _last_progress_time < .2:
+        return
+    _last_progress_time = time.monotonic()
     message = f"\x1b[1K\r[{num_indexed_sentences}/{num_sentences}"
     if loading:
         message += " | ···"
@@ -104,28 +160,53 @@ def main():
         sentence_terminator=args.sentence_terminator
     )
 
-    # initialize sharding
+    # initialize sharding (a producer thread prefetches shard batches while workers run)
     print(f"Loading UD treebank from '{args.input}'...", end='', flush=True)
     shards = gen_shards(
         conllu_file=args.input, batch_size=args.batch_size, shard_size=args.shard_size
     )
+    shard_queue = queue.Queue(maxsize=max(2, args.threads))
+
+    def produce_shards():
+        try:
+            for shard in shards:
+                shard_queue.put(shard)
+            shard_queue.put(None)  # sentinel marks batcher exhaustion
+        except Exception as error:
+            # surface producer failures in the driver instead of hanging the submit loop
+            shard_queue.put(error)
+
+    producer = threading.Thread(target=produce_shards, daemon=True)
+    producer.start()
 
     # main parallel processing loop
-    shard_workers = {}
+    completed_shards = queue.SimpleQueue()
     shard_results = {}
+    num_in_flight = 0
     num_shards = 0
     num_sentences = 0
     num_indexed_sentences = 0
     start_time = time.time()
-    with mp.Pool(processes=args.threads) as pool:
-        # process until all sentences have been indexed
-        while shards or (num_indexed_sentences < num_sentences):
-            # submit shard processing jobs
-            if shards and (len(shard_workers) < args.threads * 4):
+    with ProcessPoolExecutor(
+            max_workers=args.threads,
+            mp_context=mp.get_context('fork'),
+            initializer=init_shard_worker, initargs=(args.output, conllu_parser, args.commit_steps, args.flush_rows)
+    ) as executor:
+        # process until all shards have been submitted and completed
+        while (shard_queue is not None) or (num_in_flight > 0):
+            # submit shard processing jobs (bounded number of jobs in flight)
+            if (shard_queue is not None) and (num_in_flight < args.threads * 2):
                 print_progress(num_sentences, num_indexed_sentences, num_shards, loading=True)
-                # gather next shard batcher
-                try:
-                    shard_idx, shard_sentence_idx, shard_batches = next(shards)
+                # gather next prefetched shard batch
+                next_shard = shard_queue.get()
+                # clear queue after batcher exhaustion
+                if next_shard is None:
+                    shard_queue = None
+                # re-raise errors from the producer thread
+                elif isinstance(next_shard, Exception):
+                    raise next_shard
+                else:
+                    shard_idx, shard_sentence_idx, shard_batches = next_shard
                     num_shards = int(shard_idx+1)
                     num_sentences = int(shard_sentence_idx)
 
@@ -133,35 +214,26 @@ def main():
                     decaf_index.add_shard()
                     decaf_index.disconnect()
 
-                    # submit shard processing to pool
-                    shard_job = pool.apply_async(
-                        shard_worker,
-                        (copy.deepcopy(decaf_index), conllu_parser, shard_idx, shard_batches)
-                    )
-                    shard_workers[shard_idx] = shard_job
-                # clear generator after batcher exhaustion
-                except StopIteration:
-                    shards = None
-
-            # gather completed jobs
-            for job_shard_idx in list(shard_workers.keys()):
-                shard_job = shard_workers[job_shard_idx]
-                # check if job completed
-                if not shard_job.ready():
-                    continue
-                # process results
-                try:
-                    # retrieve results
-                    shard_results[job_shard_idx] = shard_job.get()
-                    # increment statistics
-                    num_indexed_sentences += shard_results[job_shard_idx][1]
-                    # remove from active jobs
-                    del shard_workers[job_shard_idx]
-                    # print progress
-                    print_progress(num_sentences, num_indexed_sentences, num_shards, loading=(shards is not None))
-                except Exception as exception:
-                    print(f"[Error] Could not process shard {job_shard_idx}:\n{exception}")
-                    raise exception
+                    # submit shard processing to executor (completions land on the queue)
+                    future = executor.submit(shard_worker, shard_idx, shard_batches)
+                    future.add_done_callback(lambda future, shard=shard_idx: completed_shards.put((shard, future)))
+                    num_in_flight += 1
+                continue
+
+            # block until the next shard completes
+            job_shard_idx, future = completed_shards.get()
+            num_in_flight -= 1
+            # process results
+            error = future.exception()
+            if error is not None:
+                print(f"[Error] Could not process shard {job_shard_idx}:\n{error}")
+                raise error
+            # retrieve results
+            shard_results[job_shard_idx] = future.result()
+            # increment statistics
+            num_indexed_sentences += shard_results[job_shard_idx][1]
+            # print progress
+            print_progress(num_sentences, num_indexed_sentences, num_shards, loading=(shard_queue is not None))
 
     end_time = time.time()
 